@@ -22,6 +22,7 @@ check_alignment.py — проверка соответствия спектро
 
 import argparse
 import sys
+from bisect import bisect_right
 from pathlib import Path
 
 _PROJECT_ROOT = Path(__file__).parent.parent
@@ -58,6 +59,26 @@ except ImportError:
     HAS_MATPLOTLIB = False
 
 
+# ──────────────────────────────────────────────────────────────
+#  Ноты по сегментам за один проход
+# ──────────────────────────────────────────────────────────────
+def _notes_by_segment(pm, seg_sec: float, n_seg: int) -> list:
+    """
+    Раскладывает ноты трека по сегментам: в i-й список попадают ноты,
+    НАЧАВШИЕСЯ в [i * seg_sec, i * seg_sec + seg_sec).
+    Один проход по нотам с бинарным поиском сегмента вместо полного
+    перебора всех нот для каждого сегмента.
+    """
+    seg_starts = [i * seg_sec for i in range(n_seg)]
+    buckets = [[] for _ in range(n_seg)]
+    for inst in pm.instruments:
+        for note in inst.notes:
+            i = bisect_right(seg_starts, note.start) - 1
+            if i >= 0 and note.start < seg_starts[i] + seg_sec:
+                buckets[i].append(note)
+    return buckets
+
+
 # ──────────────────────────────────────────────────────────────
 #  Текстовый отчёт по сегментам
 # ──────────────────────────────────────────────────────────────
@@ -73,6 +94,7 @@ def text_report(midi_path: str, config: AudioConfig) -> None:
     tok = MidiTokenizer(max_seq_len=512)
 
     note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+    notes_per_seg = _notes_by_segment(pm, seg, n_seg)
 
     print(f"\n{'=' * 70}")
     print(f"Файл:     {Path(midi_path).name}")
@@ -85,12 +107,10 @@ def text_report(midi_path: str, config: AudioConfig) -> None:
 
         # Ноты в окне
         notes_in_window = []
-        for inst in pm.instruments:
-            for note in inst.notes:
-                if t_start <= note.start < t_end:
-                    name = note_names[note.pitch % 12] + str(note.pitch // 12 - 1)
-                    notes_in_window.append((note.start - t_start, note.end - t_start,
-                                            note.pitch, name, note.velocity))
+        for note in notes_per_seg[i]:
+            name = note_names[note.pitch % 12] + str(note.pitch // 12 - 1)
+            notes_in_window.append((note.start - t_start, note.end - t_start,
+                                    note.pitch, name, note.velocity))
         notes_in_window.sort()
 
         # Токены
@@ -142,6 +162,7 @@ def visual_check(
         return
 
     note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+    notes_per_seg = _notes_by_segment(pm, seg_sec, spectrograms.shape[0])
 
     for seg_idx in segments_to_show:
         if seg_idx >= spectrograms.shape[0]:
@@ -155,15 +176,14 @@ def visual_check(
         spec = spectrograms[seg_idx]  # (F, T)
         tokens = tokenizer.encode_segment(midi_path, t_start, t_end)
 
-        notes_in_win = []
-        for inst in pm.instruments:
-            for note in inst.notes:
-                if t_start <= note.start < t_end:
-                    notes_in_win.append((
-                        note.start - t_start,
-                        min(note.end, t_end) - t_start,
-                        note.pitch, note.velocity,
-                    ))
+        notes_in_win = [
+            (
+                note.start - t_start,
+                min(note.end, t_end) - t_start,
+                note.pitch, note.velocity,
+            )
+            for note in notes_per_seg[seg_idx]
+        ]
 
         # ── Рисуем ──────────────────────────────────────────
         fig, axes = plt.subplots(2, 1, figsize=(14, 8))
@@ -251,6 +271,7 @@ def verify_token_timing(midi_path: str, config: AudioConfig) -> None:
     dur = pm.get_end_time()
     n_seg = int(np.ceil(dur / seg_sec))
     tokenizer = MidiTokenizer(max_seq_len=512)
+    notes_per_seg = _notes_by_segment(pm, seg_sec, min(n_seg, 20))
 
     print(f"\n{'─' * 60}")
     print("Проверка временно́й точности токенов:")
@@ -263,12 +284,8 @@ def verify_token_timing(midi_path: str, config: AudioConfig) -> None:
 
         # Находим первую ноту в окне (из MIDI)
         first_note_real = None
-        for inst in pm.instruments:
-            for note in inst.notes:
-                if t_start <= note.start < t_end:
-                    t_rel = note.start - t_start
-                    if first_note_real is None or t_rel < first_note_real:
-                        first_note_real = t_rel
+        if notes_per_seg[i]:
+            first_note_real = min(n.start for n in notes_per_seg[i]) - t_start
 
         # Декодируем токены обратно
         tokens = tokenizer.encode_segment(midi_path, t_start, t_end)
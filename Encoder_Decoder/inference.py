@@ -17,6 +17,7 @@ import argparse
 import sys
 from pathlib import Path
 
+import librosa
 import numpy as np
 import torch
 
@@ -38,7 +39,6 @@ except ImportError:
 
 def load_audio_spectrogram(audio_path: str, config: AudioConfig) -> np.ndarray:
     """Загружает WAV/MP3 и строит спектрограмму (N, F, T)."""
-    import librosa
     audio, _ = librosa.load(audio_path, sr=config.sample_rate, mono=True)
     processor = SpectrogramProcessor(config)
     return processor.compute(audio)
@@ -100,7 +100,7 @@ def run(
     print(f"Устройство: {device}")
 
     # ── 1. Спектрограмма ─────────────────────────────────────
-    conf = AudioConfig()
+    conf = AudioConfig(device=device.type)   # STFT на том же устройстве, что и модель
     spec = load_audio_spectrogram(audio_path, conf)   # (N, F, T)
     print(f"Спектрограмма: {spec.shape}")
 
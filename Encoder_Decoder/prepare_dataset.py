@@ -6,7 +6,7 @@ prepare_dataset.py
 Структура выходных данных:
     output_dir/
         sample_000000/          <-- сегмент 0 трека midi_001.mid  (0–5 сек)
-            spectrogram.npy     — (n_mels, time_steps) float32
+            spectrogram.npy     — (n_mels, time_steps) float16 (--spec_dtype)
             tokens.npy          — (max_seq_len,) int64
             meta.json           — {midi_file, segment_idx, start_sec, end_sec, n_notes}
         sample_000001/          <-- сегмент 1 трека midi_001.mid  (5–10 сек)
@@ -57,6 +57,9 @@ _PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(_PROJECT_ROOT))
 sys.path.insert(0, str(_PROJECT_ROOT / "midi_to_fft"))
 
+# Поиск MIDI-файлов общий с trim_midi.py (midi_to_fft/utils.py)
+from utils import iter_midi_files
+
 try:
     from tqdm import tqdm
 except ImportError:
@@ -64,6 +67,39 @@ except ImportError:
         return x
 
 
+# ──────────────────────────────────────────────────────────────
+#  Инициализация процесса-воркера
+# ──────────────────────────────────────────────────────────────
+# Объекты, общие для всех задач одного процесса (заполняет _init_worker)
+_CONFIG = None
+_PIPELINE = None
+_TOKENIZER = None
+_INIT_ERROR = None
+
+
+def _init_worker(soundfont_path: str, max_seq_len: int, spec_dtype: str) -> None:
+    """
+    Вызывается пулом один раз при старте процесса.
+    Импорты, AudioConfig, MidiToFFTMap и токенизатор создаются здесь,
+    а не заново для каждого MIDI-файла.
+    Ошибку не пробрасываем: упавший initializer пул перезапускает бесконечно.
+    Вместо этого _worker вернёт её в result["error"] для каждого файла.
+    """
+    global _CONFIG, _PIPELINE, _TOKENIZER, _INIT_ERROR
+
+    try:
+        # Импорты внутри воркера — каждый процесс инициализирует своё окружение.
+        # Они тоже внутри try: нет pyfluidsynth и т.п. — это ошибка инициализации
+        from midi_to_fft import AudioConfig, MidiToFFTMap
+        from tokenizer import MidiTokenizer
+
+        _CONFIG = AudioConfig(dtype=spec_dtype)
+        _PIPELINE = MidiToFFTMap(soundfont_path=soundfont_path, config=_CONFIG)
+        _TOKENIZER = MidiTokenizer(max_seq_len=max_seq_len)
+    except Exception as e:
+        _INIT_ERROR = str(e)
+
+
 # ──────────────────────────────────────────────────────────────
 #  Функция-воркер (выполняется в отдельном процессе)
 # ──────────────────────────────────────────────────────────────
@@ -73,20 +109,14 @@ def _worker(args: tuple) -> dict:
     Имена папок: sample_{file_idx:05d}_{seg_idx:03d}/
     Это гарантирует уникальность без общего счётчика между процессами.
     """
-    (midi_path_str, output_dir_str, soundfont_path,
-     max_seq_len, min_notes, verify_only, file_idx) = args
+    (midi_path_str, output_dir_str, min_notes, verify_only, file_idx) = args
 
-    # Импорты внутри воркера — каждый процесс инициализирует своё окружение
-    from midi_to_fft import AudioConfig, MidiToFFTMap
-    from tokenizer import MidiTokenizer, PAD_TOKEN
-    import pretty_midi
+    from tokenizer import PAD_TOKEN
     import numpy as np
 
     midi_path = Path(midi_path_str)
     output_dir = Path(output_dir_str)
-    config = AudioConfig()
-    tokenizer = MidiTokenizer(max_seq_len=max_seq_len)
-    seg_sec = config.segment_size_sec
+    tokenizer = _TOKENIZER
 
     result = {
         "file": midi_path.name,
@@ -96,32 +126,43 @@ def _worker(args: tuple) -> dict:
         "segments": [],
     }
 
+    if _INIT_ERROR is not None:
+        result["error"] = _INIT_ERROR
+        return result
+
+    seg_sec = _CONFIG.segment_size_sec
+
     try:
         # 1. Рендеринг + спектрограмма всего трека
-        pipeline = MidiToFFTMap(soundfont_path=soundfont_path, config=config)
-        spectrograms = pipeline.process(str(midi_path))  # (N, F, T)
+        spectrograms = _PIPELINE.process(str(midi_path))  # (N, F, T)
         N = spectrograms.shape[0]
 
-        # 2. Читаем ноты один раз для всего трека
-        pm = pretty_midi.PrettyMIDI(str(midi_path))
-        all_notes = []
-        for inst in pm.instruments:
-            all_notes.extend(inst.notes)
-        all_notes.sort(key=lambda n: n.start)
+        # 2. Начала нот (по возрастанию) — из кэшированного разбора
+        #    токенизатора: он всё равно понадобится в encode_segment,
+        #    так что MIDI не парсится лишний раз
+        note_starts = tokenizer.note_starts(str(midi_path))
+
+        # Число нот, начавшихся в [t_start, t_end), для всех сегментов сразу:
+        # два searchsorted по отсортированным началам вместо прохода
+        # по всем нотам для каждого сегмента
+        seg_starts = np.arange(N) * seg_sec
+        seg_ends = seg_starts + seg_sec
+        notes_per_seg = (np.searchsorted(note_starts, seg_ends, side="left")
+                         - np.searchsorted(note_starts, seg_starts, side="left"))
 
         # 3. Обрабатываем каждый сегмент
         for seg_idx in range(N):
             t_start = seg_idx * seg_sec
             t_end = t_start + seg_sec
 
-            n_notes = sum(1 for n in all_notes if t_start <= n.start < t_end)
+            n_notes = int(notes_per_seg[seg_idx])
 
             if n_notes < min_notes:
                 result["skipped"] += 1
                 continue
 
             tokens = tokenizer.encode_segment(str(midi_path), t_start, t_end)
-            tokens_arr = tokenizer.to_numpy(tokens, max_seq_len)
+            tokens_arr = tokenizer.to_numpy(tokens, tokenizer.max_seq_len)
             n_real_tok = int((tokens_arr != PAD_TOKEN).sum())
 
             if verify_only:
@@ -168,6 +209,7 @@ def prepare(
         min_notes: int = 0,
         workers: int = 0,
         verify_only: bool = False,
+        spec_dtype: str = "float16",
 ):
     midi_dir = Path(midi_dir)
     output_dir = Path(output_dir)
@@ -175,9 +217,9 @@ def prepare(
     if not verify_only:
         output_dir.mkdir(parents=True, exist_ok=True)
 
-    midi_files = sorted(
-        list(midi_dir.glob("*.mid")) + list(midi_dir.glob("*.midi"))
-    )
+    # Сортировка обязательна: file_idx входит в имя sample_{file_idx}_{seg},
+    # и при повторном запуске файл должен получить тот же индекс
+    midi_files = sorted(iter_midi_files(midi_dir))
     if not midi_files:
         print(f"MIDI-файлы не найдены в {midi_dir}")
         return
@@ -187,21 +229,22 @@ def prepare(
     print(f"Ядра:  {n_workers}  (CPU ядер: {mp.cpu_count()})")
     print(f"Сегмент:  5 сек  |  min_notes={min_notes}  |  max_seq_len={max_seq_len}\n")
 
-    tasks = [
-        (str(p), str(output_dir), soundfont_path,
-         max_seq_len, min_notes, verify_only, i)
+    tasks = (
+        (str(p), str(output_dir), min_notes, verify_only, i)
         for i, p in enumerate(midi_files)
-    ]
+    )
 
     t0 = time.time()
     total_saved = 0
     total_skipped = 0
     total_errors = 0
 
-    with mp.Pool(processes=n_workers) as pool:
+    with mp.Pool(processes=n_workers,
+                 initializer=_init_worker,
+                 initargs=(soundfont_path, max_seq_len, spec_dtype)) as pool:
         for result in tqdm(
                 pool.imap_unordered(_worker, tasks),
-                total=len(tasks),
+                total=len(midi_files),
                 desc="Обработка",
                 unit="midi",
         ):
@@ -246,6 +289,9 @@ if __name__ == "__main__":
     parser.add_argument("--workers", type=int, default=0,
                         help="Число процессов (0 = авто: ядра CPU - 1)")
     parser.add_argument("--verify_only", action="store_true")
+    parser.add_argument("--spec_dtype", default="float16",
+                        choices=["float16", "float32"],
+                        help="Тип spectrogram.npy (float16 — вдвое меньше на диске)")
     args = parser.parse_args()
 
     prepare(
@@ -256,4 +302,5 @@ if __name__ == "__main__":
         min_notes=args.min_notes,
         workers=args.workers,
         verify_only=args.verify_only,
+        spec_dtype=args.spec_dtype,
     )
@@ -23,6 +23,8 @@ MIDI Event Tokenizer v2
 """
  
 from __future__ import annotations
+import os
+from functools import lru_cache
 from typing import List, Tuple
 import numpy as np
  
@@ -113,11 +115,27 @@ def token_type(token: int) -> str:
 # ──────────────────────────────────────────────────────────────
 #  Внутренняя функция: собрать события из pretty_midi
 # ──────────────────────────────────────────────────────────────
-def _collect_events(midi_path: str) -> List[Tuple[float, str, int, int]]:
+def _collect_events(midi_path: str) -> Tuple[Tuple[float, str, int, int], ...]:
     """
-    Возвращает список (time_sec, 'NOTE_ON'|'NOTE_OFF', pitch, velocity),
+    Возвращает кортеж (time_sec, 'NOTE_ON'|'NOTE_OFF', pitch, velocity),
     отсортированный по времени. NOTE_OFF идут раньше NOTE_ON при одинаковом времени.
+    Кортеж общий для всех вызовов из кэша — его нельзя изменять.
+ 
+    Результат кэшируется по (путь, mtime, размер): encode_segment вызывается
+    для каждого сегмента трека, и без кэша один и тот же MIDI парсится
+    заново N раз. Изменённый на диске файл даёт новый ключ и парсится снова.
     """
+    st = os.stat(midi_path)
+    return _collect_events_cached(os.fspath(midi_path), st.st_mtime_ns, st.st_size)
+ 
+ 
+@lru_cache(maxsize=16)
+def _collect_events_cached(
+        midi_path: str,
+        mtime_ns: int,
+        size: int,
+) -> Tuple[Tuple[float, str, int, int], ...]:
+    # Кортеж, а не список: результат общий для всех вызовов из кэша
     if pretty_midi is None:
         raise ImportError("pip install pretty_midi")
     pm = pretty_midi.PrettyMIDI(midi_path)
@@ -127,7 +145,7 @@ def _collect_events(midi_path: str) -> List[Tuple[float, str, int, int]]:
             events.append((note.start, "NOTE_ON", note.pitch, note.velocity))
             events.append((note.end, "NOTE_OFF", note.pitch, 0))
     events.sort(key=lambda e: (e[0], 0 if e[1] == "NOTE_OFF" else 1))
-    return events
+    return tuple(events)
  
  
 # ──────────────────────────────────────────────────────────────
@@ -221,11 +239,24 @@ class MidiTokenizer:
         if not filtered:
             return [BOS_TOKEN, SILENCE_TOKEN, EOS_TOKEN]
  
-        # Сортируем ещё раз после смещения
-        filtered.sort(key=lambda e: (e[0], 0 if e[1] == "NOTE_OFF" else 1))
+        # Повторная сортировка не нужна: all_events уже упорядочены, сдвиг
+        # на start_sec монотонен, а обрезанные до end_sec NOTE_OFF не раньше
+        # любого NOTE_ON окна (t < end_sec) — порядок filtered сохраняется
  
         return _events_to_tokens(filtered, self.max_seq_len)
  
+    # ── Времена начала нот ────────────────────────────────────
+    def note_starts(self, midi_path: str) -> np.ndarray:
+        """
+        Времена NOTE_ON всех нот трека (сек), по возрастанию.
+        Берутся из того же кэша, что и encode_segment, — MIDI не парсится заново.
+        """
+        return np.fromiter(
+            (t for (t, etype, _, _) in _collect_events(midi_path)
+             if etype == "NOTE_ON"),
+            dtype=np.float64,
+        )
+ 
     # ── Декодирование ─────────────────────────────────────────
     def decode(self, tokens: List[int]) -> List[Tuple[float, str, int, int]]:
         """Токены -список (time_sec, event_type, pitch, velocity)."""
@@ -22,6 +22,7 @@ verify_sample.py — ручная проверка одного сэмпла д
 
 import argparse
 import json
+import os
 import random
 import sys
 from pathlib import Path
@@ -54,20 +55,26 @@ def check_one(sample_dir: Path, save_png: bool = False) -> None:
     tokens_path = sample_dir / "tokens.npy"
     meta_path = sample_dir / "meta.json"
 
-    if not spec_path.exists() or not tokens_path.exists():
+    # Сразу открываем файлы: отдельная проверка exists() — лишний stat
+    try:
+        spec = np.load(spec_path).astype(np.float32, copy=False)  # (F, T)
+        tokens = np.load(tokens_path)  # (max_seq_len,) int64
+    except FileNotFoundError:
         print(f"[ОШИБКА] Не найдены spectrogram.npy / tokens.npy в {sample_dir}")
         return
 
-    spec = np.load(spec_path)  # (F, T) float32
-    tokens = np.load(tokens_path)  # (max_seq_len,) int64
+    # meta.json нужен и для печати, и для заголовка картинки — читаем один раз
+    try:
+        meta = json.loads(meta_path.read_text())
+    except FileNotFoundError:
+        meta = None
 
     # ── 2. Мета-информация ────────────────────────────────────
     print(f"\n{'=' * 60}")
     print(f"Сэмпл: {sample_dir.name}")
     print(f"{'=' * 60}")
 
-    if meta_path.exists():
-        meta = json.loads(meta_path.read_text())
+    if meta is not None:
         print(f"MIDI-файл:  {meta.get('midi_file', '?')}")
         print(f"Сегмент:    {meta.get('segment_idx', '?')}  "
               f"[{meta.get('start_sec', '?')} – {meta.get('end_sec', '?')} сек]")
@@ -117,10 +124,9 @@ def check_one(sample_dir: Path, save_png: bool = False) -> None:
         print(f"  {line}")
 
     # Статистика по типам токенов
-    note_on = sum(1 for t in real_tokens if 3 <= t < 131)
-    note_off = sum(1 for t in real_tokens if 131 <= t < 259)
-    time_sh = sum(1 for t in real_tokens if 259 <= t < 359)
-    velocity = sum(1 for t in real_tokens if 359 <= t < 391)
+    # Один проход: границы диапазонов → номер корзины для каждого токена
+    bins = np.digitize(real_tokens, [3, 131, 259, 359, 391])
+    note_on, note_off, time_sh, velocity = np.bincount(bins, minlength=6)[1:5]
     print(f"\nСтатистика токенов:")
     print(f"  NOTE_ON:    {note_on}")
     print(f"  NOTE_OFF:   {note_off}")
@@ -132,11 +138,10 @@ def check_one(sample_dir: Path, save_png: bool = False) -> None:
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 6))
 
         title = sample_dir.name
-        if meta_path.exists():
-            m = json.loads(meta_path.read_text())
-            title += f"  |  {m.get('midi_file', '')}  seg={m.get('segment_idx', '')}  " \
-                     f"[{m.get('start_sec', '')}–{m.get('end_sec', '')} сек]  " \
-                     f"notes={m.get('n_notes', '')}  tokens={m.get('n_tokens', '')}"
+        if meta is not None:
+            title += f"  |  {meta.get('midi_file', '')}  seg={meta.get('segment_idx', '')}  " \
+                     f"[{meta.get('start_sec', '')}–{meta.get('end_sec', '')} сек]  " \
+                     f"notes={meta.get('n_notes', '')}  tokens={meta.get('n_tokens', '')}"
         fig.suptitle(title, fontsize=9)
 
         im = ax1.imshow(spec, aspect="auto", origin="lower", cmap="magma", vmin=0, vmax=1)
@@ -197,10 +202,12 @@ def main():
         check_one(Path(args.sample_dir), save_png=args.save_png)
     else:
         dataset_dir = Path(args.dataset_dir)
-        samples = sorted([
-            d for d in dataset_dir.iterdir()
-            if d.is_dir() and (d / "spectrogram.npy").exists()
-        ])
+        # os.scandir: is_dir() берётся из записи каталога без отдельного stat
+        with os.scandir(dataset_dir) as it:
+            samples = sorted([
+                d for d in (Path(e.path) for e in it if e.is_dir())
+                if (d / "spectrogram.npy").exists()
+            ])
         if not samples:
             print(f"Сэмплы не найдены в {dataset_dir}")
             return
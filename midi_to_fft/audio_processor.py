@@ -3,7 +3,7 @@ SpectrogramProcessor
 ====================
 Преобразует аудио-сигнал в набор Mel-спектрограмм (один .npy файл = один трек).
 
-Выход: np.ndarray формы (num_segments, n_mels, time_steps), dtype=float32
+Выход: np.ndarray формы (num_segments, n_mels, time_steps), dtype=config.dtype
 
 Параметры по умолчанию (AudioConfig):
   sample_rate  = 22050 Гц
@@ -23,6 +23,7 @@ SpectrogramProcessor
 """
 
 import numpy as np
+import scipy.fft
 import librosa
 from config import AudioConfig
 
@@ -35,12 +36,26 @@ class SpectrogramProcessor:
     def __init__(self, config: AudioConfig):
         self.config = config
 
+        # Окно и Mel-фильтрбанк не зависят от сигнала — строим один раз.
+        # librosa.feature.melspectrogram пересобирает их на каждом вызове,
+        # т.е. для каждого 5-секундного сегмента каждого трека.
+        self._window = librosa.filters.get_window(
+            "hann", config.win_length, fftbins=True)
+        self._mel_basis = None
+        if config.use_mel:
+            self._mel_basis = librosa.filters.mel(
+                sr=config.sample_rate,
+                n_fft=config.n_fft,
+                n_mels=config.n_mels,
+                fmax=config.fmax,
+            )
+
     def compute(self, audio: np.ndarray) -> np.ndarray:
         """
         Разбивает аудио на сегменты и строит Mel-спектрограмму для каждого.
 
         Возвращает:
-            np.ndarray формы (num_segments, n_mels, time_steps), float32
+            np.ndarray формы (num_segments, n_mels, time_steps), config.dtype
             Значения нормированы в диапазон [0, 1] по дБ-шкале.
             0.0 = тишина (−80 дБ), 1.0 = максимальная амплитуда (0 дБ)
         """
@@ -58,49 +73,58 @@ class SpectrogramProcessor:
             audio = np.pad(audio, (0, segment_len - remainder))
 
         num_segments = len(audio) // segment_len
-        all_specs = []
-
-        # ── 3. Mel-спектрограмма для каждого сегмента ────────
-        for i in range(num_segments):
-            seg = audio[i * segment_len: (i + 1) * segment_len]
-
-            if cfg.use_mel:
-                # Mel-спектрограмма через librosa
-                mel = librosa.feature.melspectrogram(
-                    y=seg,
-                    sr=sr,
-                    n_fft=cfg.n_fft,
-                    hop_length=cfg.hop_length,
-                    win_length=cfg.win_length,
-                    n_mels=cfg.n_mels,
-                    fmax=cfg.fmax,
-                    center=True,
-                )
-                if cfg.log_scale:
-                    spec = librosa.power_to_db(mel, ref=np.max, top_db=80.0)
-                else:
-                    spec = mel
-            else:
-                # Сырой FFT
-                stft = librosa.stft(
-                    seg,
-                    n_fft=cfg.n_fft,
-                    hop_length=cfg.hop_length,
-                    win_length=cfg.win_length,
-                    center=True,
-                )
-                spec = np.abs(stft)
-                if cfg.log_scale:
-                    spec = librosa.power_to_db(spec ** 2, ref=np.max, top_db=80.0)
-
-            all_specs.append(spec)
-
-        if not all_specs:
+        if num_segments == 0:
             raise ValueError("Не удалось сформировать ни одного сегмента")
 
-        # ── 4. Стек и нормировка в [0, 1] ─────────────────────
+        if cfg.device:
+            # ── 3'. Все сегменты одним батчем через torch.stft ───
+            spectrograms = self._compute_torch(
+                audio.reshape(num_segments, segment_len))
+        else:
+            # ── 3. Mel-спектрограмма для каждого сегмента ────────
+            # librosa считает FFT через scipy.fft — число потоков задаём здесь
+            with scipy.fft.set_workers(cfg.fft_workers):
+                all_specs = []
+                for i in range(num_segments):
+                    seg = audio[i * segment_len: (i + 1) * segment_len]
+
+                    if cfg.use_mel:
+                        # Mel-спектрограмма: |STFT|² × кэшированный фильтрбанк
+                        # (то же, что librosa.feature.melspectrogram с power=2)
+                        power = np.abs(librosa.stft(
+                            seg,
+                            n_fft=cfg.n_fft,
+                            hop_length=cfg.hop_length,
+                            win_length=cfg.win_length,
+                            window=self._window,
+                            center=True,
+                        )) ** 2
+                        mel = self._mel_basis @ power
+                        if cfg.log_scale:
+                            spec = librosa.power_to_db(mel, ref=np.max, top_db=80.0)
+                        else:
+                            spec = mel
+                    else:
+                        # Сырой FFT
+                        stft = librosa.stft(
+                            seg,
+                            n_fft=cfg.n_fft,
+                            hop_length=cfg.hop_length,
+                            win_length=cfg.win_length,
+                            window=self._window,
+                            center=True,
+                        )
+                        spec = np.abs(stft)
+                        if cfg.log_scale:
+                            spec = librosa.power_to_db(spec ** 2, ref=np.max, top_db=80.0)
+
+                    all_specs.append(spec)
+
+            spectrograms = np.stack(all_specs, axis=0)
+
+        # ── 4. Нормировка в [0, 1] ────────────────────────────
         # (num_segments, n_mels/freq_bins, time_steps)
-        spectrograms = np.stack(all_specs, axis=0).astype(np.float32)
+        spectrograms = spectrograms.astype(np.float32)
 
         if cfg.log_scale:
             # dB диапазон: [−80, 0] → нормируем в [0, 1]
@@ -108,4 +132,43 @@ class SpectrogramProcessor:
             spectrograms = (spectrograms - _DB_MIN) / (_DB_MAX - _DB_MIN)
             spectrograms = np.clip(spectrograms, 0.0, 1.0)
 
-        return spectrograms
+        return spectrograms.astype(cfg.dtype, copy=False)
+
+    def _compute_torch(self, segments: np.ndarray) -> np.ndarray:
+        """
+        То же, что цикл по сегментам в compute, но одним батчем на
+        torch-устройстве (config.device): (N, segment_len) → (N, F, T).
+        power_to_db(ref=np.max, top_db=80) повторён поштучно по сегментам.
+        """
+        import torch
+
+        cfg = self.config
+        device = torch.device(cfg.device)
+
+        x = torch.from_numpy(np.ascontiguousarray(segments, dtype=np.float32)).to(device)
+        window = torch.from_numpy(self._window.astype(np.float32)).to(device)
+        stft = torch.stft(
+            x,
+            n_fft=cfg.n_fft,
+            hop_length=cfg.hop_length,
+            win_length=cfg.win_length,
+            window=window,
+            center=True,
+            pad_mode="constant",
+            return_complex=True,
+        )
+        spec = stft.abs() ** 2  # (N, 1 + n_fft/2, T)
+
+        if cfg.use_mel:
+            mel_basis = torch.from_numpy(self._mel_basis.astype(np.float32)).to(device)
+            spec = mel_basis @ spec  # (N, n_mels, T)
+        elif not cfg.log_scale:
+            spec = spec.sqrt()  # сырой FFT без log — амплитуда, как в librosa-ветке
+
+        if cfg.log_scale:
+            amin = 1e-10
+            ref = spec.amax(dim=(-2, -1), keepdim=True).clamp_min(amin)
+            spec = 10.0 * torch.log10(spec.clamp_min(amin)) - 10.0 * torch.log10(ref)
+            spec = torch.maximum(spec, spec.amax(dim=(-2, -1), keepdim=True) - 80.0)
+
+        return spec.cpu().numpy()
@@ -28,3 +28,17 @@ class AudioConfig:
 
     # ── Логарифмическое масштабирование (обязательно) ────────
     log_scale: bool = True  # power_to_db: диапазон ~[-80, 0] дБ
+
+    # ── Вычислитель STFT ─────────────────────────────────────
+    # None  — librosa на CPU, по сегменту за раз (как при создании датасета)
+    # "cuda"/"cpu" — torch.stft, все сегменты трека одним батчем
+    device: str | None = None
+    # Потоки scipy.fft (бэкенд FFT librosa) для librosa-пути; 1 — без потоков.
+    # В prepare_dataset параллелизм уже по процессам — там оставляем 1.
+    fft_workers: int = 1
+
+    # ── Тип выходного массива ────────────────────────────────
+    # Значения после нормировки лежат в [0, 1], float16 хранит их
+    # с точностью ~1e-3 и вдвое уменьшает .npy на диске.
+    # Для инференса оставляем float32 — модель ждёт его на входе.
+    dtype: str = "float32"
@@ -10,7 +10,7 @@ pipeline = MidiToFFTMap(
 
 fft_map = pipeline.process(
     midi_path="examples/1.mid",
-    output_wav="data/1.wav",
+    # output_wav="data/1.wav" — только для прослушивания, модели WAV не нужен
     output_fft="data/1_fft.npy"
 )
 
@@ -1,3 +1,7 @@
+import queue
+import threading
+from pathlib import Path
+
 import numpy as np
 from config import AudioConfig
 from midi_renderer import MidiRenderer
@@ -25,3 +29,78 @@ class MidiToFFTMap:
             np.save(output_fft, fft_map)
 
         return fft_map
+
+    def process_many(self, midi_paths: list[str], out_dir: str) -> list[str]:
+        """
+        Рендер и спектрограммы для списка файлов: out_dir/<имя>.npy.
+        Рендер идёт в отдельном потоке и опережает STFT не более чем
+        на queue_size треков — FluidSynth и FFT отпускают GIL и
+        выполняются параллельно. Возвращает пути к сохранённым .npy.
+        """
+        out_dir = Path(out_dir)
+
+        # Выход называется по имени файла без папки — одинаковые имена
+        # из разных папок молча перезаписали бы друг друга
+        outputs = [str(out_dir / (Path(p).stem + ".npy")) for p in midi_paths]
+        if len(set(outputs)) != len(outputs):
+            seen, dups = set(), set()
+            for o in outputs:
+                (dups if o in seen else seen).add(o)
+            raise ValueError(
+                f"Совпадают имена выходных файлов: {sorted(dups)}")
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        queue_size = 4
+        tasks: queue.Queue = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        errors: list[BaseException] = []
+
+        def put(item) -> bool:
+            # put с таймаутом, чтобы не зависнуть на полной очереди,
+            # если потребитель уже вышел
+            while not stop.is_set():
+                try:
+                    tasks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def producer():
+            try:
+                for path in midi_paths:
+                    # Синтезатор общий с process() — после остановки не трогаем
+                    if stop.is_set() or not put((path, self.renderer.render(path))):
+                        return
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(None)
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+
+        saved = []
+        try:
+            for output_fft in outputs:
+                item = tasks.get()
+                if item is None:
+                    break
+                _, audio = item
+                np.save(output_fft, self.processor.compute(audio))
+                saved.append(output_fft)
+        finally:
+            # Ошибка в compute/np.save: останавливаем рендер, освобождаем
+            # очередь и дожидаемся потока, прежде чем выйти
+            stop.set()
+            while True:
+                try:
+                    tasks.get_nowait()
+                except queue.Empty:
+                    break
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return saved
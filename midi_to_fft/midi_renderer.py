@@ -11,14 +11,37 @@ class MidiRenderer:
         self.soundfont_path = soundfont_path
         self.sample_rate = sample_rate
 
+        # pyfluidsynth нужен только для рендеринга: импорт здесь, чтобы пакет
+        # (AudioConfig, SpectrogramProcessor) импортировался и без него
+        import fluidsynth
+
+        # Синтезатор и SoundFont (FluidR3_GM ~140 МБ) загружаем один раз.
+        # midi.fluidsynth(sf2_path=...) создавал их заново на каждый файл.
+        self._synth = fluidsynth.Synth(samplerate=float(sample_rate))
+        self._sfid = self._synth.sfload(soundfont_path)
+
     def render(self, midi_path: str, output_wav: str | None = None) -> np.ndarray:
         midi = pretty_midi.PrettyMIDI(midi_path)
+
+        # Сбрасываем контроллеры, pitch bend и хвосты голосов прошлого файла
+        self._synth.system_reset()
+
+        # pretty_midi отдаёт float64 — STFT дальше упирается в память,
+        # float32 вдвое меньше и точности для спектрограммы хватает
         audio = midi.fluidsynth(
-            fs=self.sample_rate,
-            sf2_path=self.soundfont_path
-        )
+            synthesizer=self._synth,
+            sfid=self._sfid,
+        ).astype(np.float32, copy=False)
 
         if output_wav:
             sf.write(output_wav, audio, self.sample_rate)
 
         return audio
+
+    def close(self) -> None:
+        if getattr(self, "_synth", None) is not None:
+            self._synth.delete()
+            self._synth = None
+
+    def __del__(self):
+        self.close()
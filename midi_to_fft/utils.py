@@ -1,5 +1,26 @@
 import os
+from pathlib import Path
+
+# Расширения MIDI в нижнем регистре: сравниваем с .lower() от расширения файла
+_MIDI_EXTENSIONS = frozenset({".mid", ".midi"})
 
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
+
+
+def iter_midi_files(midi_dir: Path):
+    """
+    Лениво перечисляет .mid/.midi в папке (без подпапок) через os.scandir.
+    Тип записи берётся из каталога без отдельного stat на каждый файл,
+    расширение сравнивается без учёта регистра (.MID тоже находится).
+    """
+    try:
+        it = os.scandir(midi_dir)
+    except FileNotFoundError:
+        return
+    with it:
+        for entry in it:
+            if (os.path.splitext(entry.name)[1].lower() in _MIDI_EXTENSIONS
+                    and entry.is_file()):
+                yield Path(entry.path)
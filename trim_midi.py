@@ -12,15 +12,26 @@ trim_midi.py
 Запуск:
     python trim_midi.py --input_dir ./midi_raw --output_dir ./midi_trimmed
 
+    # Задать число процессов (по умолчанию = число ядер - 1, 1 = без пула):
+    python trim_midi.py --input_dir ./midi_raw --output_dir ./midi_trimmed --workers 8
+
     # Кастомные параметры:
     python trim_midi.py --input_dir ./midi_raw --output_dir ./midi_trimmed \\
         --target 60 --tolerance 15 --min_duration 30
 """
 
 import argparse
+import multiprocessing as mp
 import shutil
+import sys
+from bisect import bisect_right
+from contextlib import nullcontext
 from pathlib import Path
 
+# Общие утилиты (поиск MIDI-файлов) — в midi_to_fft/utils.py
+sys.path.insert(0, str(Path(__file__).parent / "midi_to_fft"))
+from utils import iter_midi_files
+
 try:
     import pretty_midi
 except ImportError:
@@ -42,43 +53,140 @@ def trim_midi_to_duration(
     Возвращает новый PrettyMIDI с нотами только из этого окна.
     Время нот смещается: новый t=0 соответствует start_sec оригинала.
     """
-    out = pretty_midi.PrettyMIDI(initial_tempo=_get_tempo(pm))
+    return split_midi(pm, [(start_sec, end_sec)])[0]
+
+
+def split_midi(
+    pm: pretty_midi.PrettyMIDI,
+    windows: list,
+) -> list:
+    """
+    Режет PrettyMIDI сразу на несколько окон [start, end) за один проход по нотам.
+    Окна должны идти по возрастанию и не перекрываться (как parts в _worker):
+    окно для ноты ищется бинарным поиском, а не перебором всех окон.
+    Для каждого окна результат совпадает с trim_midi_to_duration.
+    """
+    tempo  = _get_tempo(pm)
+    starts = [w[0] for w in windows]
+    outs   = [pretty_midi.PrettyMIDI(initial_tempo=tempo) for _ in windows]
 
     for inst in pm.instruments:
-        new_inst = pretty_midi.Instrument(
-            program=inst.program,
-            is_drum=inst.is_drum,
-            name=inst.name,
-        )
+        new_insts = [
+            pretty_midi.Instrument(
+                program=inst.program,
+                is_drum=inst.is_drum,
+                name=inst.name,
+            )
+            for _ in windows
+        ]
         for note in inst.notes:
             # Включаем ноту если она НАЧАЛАСЬ в окне
-            if start_sec <= note.start < end_sec:
-                new_start = note.start - start_sec
-                # Конец ноты ограничиваем концом окна
-                new_end   = min(note.end, end_sec) - start_sec
-                if new_end > new_start:
-                    new_inst.notes.append(pretty_midi.Note(
-                        velocity=note.velocity,
-                        pitch=note.pitch,
-                        start=new_start,
-                        end=new_end,
-                    ))
-        if new_inst.notes:
-            out.instruments.append(new_inst)
-
-    return out
+            w = bisect_right(starts, note.start) - 1
+            if w < 0:
+                continue
+            start_sec, end_sec = windows[w]
+            if note.start >= end_sec:
+                continue
+            new_start = note.start - start_sec
+            # Конец ноты ограничиваем концом окна
+            new_end   = min(note.end, end_sec) - start_sec
+            if new_end > new_start:
+                new_insts[w].notes.append(pretty_midi.Note(
+                    velocity=note.velocity,
+                    pitch=note.pitch,
+                    start=new_start,
+                    end=new_end,
+                ))
+        for out, new_inst in zip(outs, new_insts):
+            if new_inst.notes:
+                out.instruments.append(new_inst)
+
+    return outs
 
 
 def _get_tempo(pm: pretty_midi.PrettyMIDI) -> float:
-    tempos = pm.get_tempo_changes()
-    if len(pm.get_tempo_changes()) > 0:
-        _, tempo_values = pm.get_tempo_changes(), pm._tick_scales
-        # Берём начальный темп
-        try:
-            return pm.estimate_tempo()
-        except Exception:
-            return 120.0
-    return 120.0
+    # Начальный темп берём прямо из файла. get_tempo_changes() всегда
+    # возвращает хотя бы один темп (pretty_midi заполняет его из _tick_scales),
+    # так что estimate_tempo() по нотам здесь не нужен
+    _, tempo_values = pm.get_tempo_changes()
+    return float(tempo_values[0]) if len(tempo_values) else 120.0
+
+
+# ──────────────────────────────────────────────────────────────
+#  Функция-воркер (выполняется в отдельном процессе)
+# ──────────────────────────────────────────────────────────────
+def _worker(args: tuple) -> dict:
+    """
+    Обрабатывает один MIDI-файл.
+    Строки dry_run-отчёта не печатаются здесь, а возвращаются в result["lines"] —
+    их выводит главный процесс, чтобы вывод разных файлов не перемешивался.
+    """
+    (midi_path_str, output_dir_str, target_sec, tolerance_sec,
+     min_duration_sec, dry_run) = args
+
+    midi_path  = Path(midi_path_str)
+    output_dir = Path(output_dir_str)
+
+    result = {
+        "file": midi_path.name,
+        "status": None,     # "copied" | "trimmed" | "skipped"
+        "parts": 0,
+        "lines": [],
+        "error": None,
+    }
+
+    try:
+        pm  = pretty_midi.PrettyMIDI(str(midi_path))
+        dur = pm.get_end_time()
+
+        # ── Слишком короткий → пропускаем ────────────────
+        if dur < min_duration_sec:
+            result["status"] = "skipped"
+            if dry_run:
+                result["lines"].append(
+                    f"  SKIP  {midi_path.name:40s}  {dur:.1f}s  (< {min_duration_sec}s)")
+            return result
+
+        # ── Нормальная длина → копируем как есть ─────────
+        if dur <= target_sec + tolerance_sec:
+            result["status"] = "copied"
+            if dry_run:
+                result["lines"].append(f"  COPY  {midi_path.name:40s}  {dur:.1f}s")
+            else:
+                shutil.copy2(midi_path, output_dir / midi_path.name)
+            return result
+
+        # ── Длинный → нарезаем на куски ──────────────────
+        n_parts  = int(dur // target_sec)
+        leftover = dur - n_parts * target_sec
+
+        # Если остаток >= min_duration_sec — добавляем ещё один кусок
+        parts = []
+        for i in range(n_parts):
+            parts.append((i * target_sec, (i + 1) * target_sec))
+        if leftover >= min_duration_sec:
+            parts.append((n_parts * target_sec, dur))
+
+        stem = midi_path.stem
+        if dry_run:
+            result["lines"].append(
+                f"  CUT   {midi_path.name:40s}  {dur:.1f}s  → {len(parts)} частей")
+            for i, (s, e) in enumerate(parts):
+                result["lines"].append(f"         part{i:02d}: [{s:.1f}–{e:.1f}]")
+        else:
+            for i, chunk in enumerate(split_midi(pm, parts)):
+                if not any(inst.notes for inst in chunk.instruments):
+                    continue   # пустой кусок — пропускаем
+                out_name = output_dir / f"{stem}_part{i:02d}.mid"
+                chunk.write(str(out_name))
+                result["parts"] += 1
+
+        result["status"] = "trimmed"
+
+    except Exception as e:
+        result["error"] = str(e)
+
+    return result
 
 
 def process(
@@ -89,76 +197,54 @@ def process(
     min_duration_sec: float = 20.0, # короче — пропускаем
     duplicate_short: bool = False,  # дублировать короткие до target
     dry_run: bool = False,
+    workers: int = 0,               # 0 = авто (ядра - 1), 1 = без пула
 ):
     input_dir  = Path(input_dir)
     output_dir = Path(output_dir)
     if not dry_run:
         output_dir.mkdir(parents=True, exist_ok=True)
 
-    midi_files = sorted(
-        list(input_dir.glob("*.mid")) + list(input_dir.glob("*.midi"))
-    )
+    midi_files = sorted(iter_midi_files(input_dir))
     if not midi_files:
         print(f"MIDI не найдены в {input_dir}")
         return
 
-    print(f"Найдено: {len(midi_files)} файлов")
+    n_workers = workers if workers > 0 else max(1, mp.cpu_count() - 1)
+    print(f"Найдено: {len(midi_files)} файлов  |  Процессов: {n_workers}")
     print(f"Параметры: target={target_sec}с  tolerance=±{tolerance_sec}с  "
           f"min={min_duration_sec}с  dry_run={dry_run}\n")
 
-    stats = {"copied": 0, "trimmed": 0, "skipped": 0, "parts": 0, "errors": 0}
-
-    for midi_path in tqdm(midi_files, desc="Обработка"):
-        try:
-            pm  = pretty_midi.PrettyMIDI(str(midi_path))
-            dur = pm.get_end_time()
+    tasks = [
+        (str(p), str(output_dir), target_sec, tolerance_sec,
+         min_duration_sec, dry_run)
+        for p in midi_files
+    ]
 
-            # ── Слишком короткий → пропускаем ────────────────
-            if dur < min_duration_sec:
-                stats["skipped"] += 1
-                if dry_run:
-                    print(f"  SKIP  {midi_path.name:40s}  {dur:.1f}s  (< {min_duration_sec}s)")
-                continue
+    stats = {"copied": 0, "trimmed": 0, "skipped": 0, "parts": 0, "errors": 0}
 
-            # ── Нормальная длина → копируем как есть ─────────
-            if dur <= target_sec + tolerance_sec:
-                stats["copied"] += 1
-                if dry_run:
-                    print(f"  COPY  {midi_path.name:40s}  {dur:.1f}s")
-                else:
-                    shutil.copy2(midi_path, output_dir / midi_path.name)
+    # workers=1 — последовательный режим без пула (удобно для отладки)
+    # with: при исключении (в т.ч. Ctrl-C) выход из пула вызывает terminate(),
+    # и оставшиеся в очереди задачи не дописывают файлы после прерывания
+    with (mp.Pool(processes=n_workers) if n_workers > 1
+          else nullcontext()) as pool:
+        if pool is None:
+            results = map(_worker, tasks)
+        elif dry_run:
+            # Отчёт dry_run печатаем в порядке файлов
+            results = pool.imap(_worker, tasks)
+        else:
+            # Результаты — по мере готовности: прогресс-бар не ждёт медленный
+            # файл в начале очереди, пока остальные уже обработаны
+            results = pool.imap_unordered(_worker, tasks)
+        for result in tqdm(results, total=len(tasks), desc="Обработка"):
+            for line in result["lines"]:
+                print(line)
+            if result["error"]:
+                stats["errors"] += 1
+                print(f"  [ОШИБКА] {result['file']}: {result['error']}")
                 continue
-
-            # ── Длинный → нарезаем на куски ──────────────────
-            n_parts  = int(dur // target_sec)
-            leftover = dur - n_parts * target_sec
-
-            # Если остаток >= min_duration_sec — добавляем ещё один кусок
-            parts = []
-            for i in range(n_parts):
-                parts.append((i * target_sec, (i + 1) * target_sec))
-            if leftover >= min_duration_sec:
-                parts.append((n_parts * target_sec, dur))
-
-            stem = midi_path.stem
-            if dry_run:
-                print(f"  CUT   {midi_path.name:40s}  {dur:.1f}s  → {len(parts)} частей")
-                for i, (s, e) in enumerate(parts):
-                    print(f"         part{i:02d}: [{s:.1f}–{e:.1f}]")
-            else:
-                for i, (t_start, t_end) in enumerate(parts):
-                    chunk = trim_midi_to_duration(pm, t_start, t_end)
-                    if not any(inst.notes for inst in chunk.instruments):
-                        continue   # пустой кусок — пропускаем
-                    out_name = output_dir / f"{stem}_part{i:02d}.mid"
-                    chunk.write(str(out_name))
-                    stats["parts"] += 1
-
-            stats["trimmed"] += 1
-
-        except Exception as e:
-            stats["errors"] += 1
-            print(f"  [ОШИБКА] {midi_path.name}: {e}")
+            stats[result["status"]] += 1
+            stats["parts"] += result["parts"]
 
     # ── Итоговая статистика ───────────────────────────────────
     print(f"\n{'='*55}")
@@ -168,11 +254,15 @@ def process(
     print(f"  Пропущено (коротк.):   {stats['skipped']}")
     print(f"  Ошибок:                {stats['errors']}")
     if not dry_run:
-        out_files = len(list(output_dir.glob("*.mid")))
+        # Считаем на лету тем же scandir-обходом, без списка путей;
+        # заодно учитываются скопированные как есть .midi
+        out_files = sum(1 for _ in iter_midi_files(output_dir))
         print(f"\nФайлов в {output_dir}:  {out_files}")
 
 
 if __name__ == "__main__":
+    mp.freeze_support()  # нужно для Windows
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--input_dir",       required=True)
     parser.add_argument("--output_dir",      required=True)
@@ -184,6 +274,8 @@ if __name__ == "__main__":
                         help="Короче этого — пропускается (default: 20)")
     parser.add_argument("--dry_run",         action="store_true",
                         help="Только показать что будет, не записывать файлы")
+    parser.add_argument("--workers",         type=int, default=0,
+                        help="Число процессов (0 = авто: ядра CPU - 1, 1 = без пула)")
     args = parser.parse_args()
 
     process(
@@ -193,4 +285,5 @@ if __name__ == "__main__":
         tolerance_sec    = args.tolerance,
         min_duration_sec = args.min_duration,
         dry_run          = args.dry_run,
+        workers          = args.workers,
     )
\ No newline at end of file